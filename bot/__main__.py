@@ -1,11 +1,14 @@
 import argparse
 import asyncio
 import logging
+import queue
 import random
 import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from zoneinfo import ZoneInfo
 
+import uvloop
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio.session import AsyncSession
@@ -37,13 +40,18 @@ scheduler = Scheduler()
 async def run_scheduler() -> None:
     while True:
         await scheduler.run_pending()
-        await asyncio.sleep(1)
+        # Спим до ближайшей задачи, но не дольше минуты.
+        delay = scheduler.idle_seconds
+        if delay is None or delay < 0:
+            delay = 1
+        await asyncio.sleep(min(delay, 60))
 
 
 async def set_tasks(
     client: TelegramClient,
     sessionmaker: async_sessionmaker[AsyncSession],
     storage: RedisStorage,
+    account_id: int,
 ):
     min_interval = max(60, se.mailing_interval_min_seconds)
     max_interval = max(min_interval, se.mailing_interval_max_seconds)
@@ -59,6 +67,7 @@ async def set_tasks(
             client,
             sessionmaker,
             storage,
+            account_id,
         )
 
     mailing_job.do(_mailing_job)
@@ -66,19 +75,18 @@ async def set_tasks(
         process_jobs,
         client,
         sessionmaker,
-        storage,
+        account_id,
     )
     scheduler.every(3).hours.do(
         update_account_name,
         client,
         sessionmaker,
-        storage,
+        account_id,
     )
 
 
-async def cache_account_identity(
+async def resolve_account_id(
     sessionmaker: async_sessionmaker[AsyncSession],
-    storage: RedisStorage,
     path_session: str,
 ) -> int | None:
     async with sessionmaker() as session:
@@ -88,14 +96,10 @@ async def cache_account_identity(
         account_id = result.scalar_one_or_none()
 
     if account_id is None:
-        logger.error(
-            "Не найден аккаунт с path_session=%s — записать в Redis нечего",
-            path_session,
-        )
+        logger.error("Не найден аккаунт с path_session=%s", path_session)
         return None
 
-    await storage.set("account_id", account_id)
-    logger.info("Записали account_id=%s в Redis для текущей сессии", account_id)
+    logger.info("account_id=%s для текущей сессии", account_id)
     return account_id
 
 
@@ -131,17 +135,17 @@ async def main() -> None:
 
     storage = RedisStorage(redis=redis, client_hash=bot_api_hash)
 
-    account_id = await cache_account_identity(
-        sessionmaker, storage, path_session=bot_path_session
+    account_id = await resolve_account_id(
+        sessionmaker, path_session=bot_path_session
     )
     if account_id is None:
         logger.error("Останавливаем бота: нет привязки аккаунта к сессии")
         return
 
     # Обновляем имя аккаунта сразу при старте, если оно пустое или изменилось.
-    await update_account_name(client, sessionmaker, storage)
+    await update_account_name(client, sessionmaker, account_id)
 
-    await set_tasks(client, sessionmaker, storage)
+    await set_tasks(client, sessionmaker, storage, account_id=account_id)
 
     # Запуск планировщика и клиента
     try:
@@ -171,13 +175,20 @@ if __name__ == "__main__":
     # Формат логов
     f = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
-    # Обработчик для вывода в консоль
+    # Обработчик для вывода в консоль. Пишет фоновый поток QueueListener,
+    # чтобы запись в stdout не блокировала event loop.
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(f)
-    logger.addHandler(console_handler)
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, console_handler)
+    listener.start()
 
     # Подавляем шумные логи Telethon об обновлениях каналов
     logging.getLogger("telethon.client.updates").setLevel(logging.WARNING)
     logging.getLogger("telethon").setLevel(logging.WARNING)
 
-    asyncio.run(main())
+    try:
+        uvloop.run(main())
+    finally:
+        listener.stop()
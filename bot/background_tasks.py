@@ -1,13 +1,13 @@
 import asyncio
 import logging
 import random
-import re
+import string
 from typing import Any
 
 import msgspec
-from sqlalchemy import delete, select, update
+from sqlalchemy import delete, false, func, insert, lambda_stmt, select, update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
-from telethon import TelegramClient, functions
+from telethon import TelegramClient, functions, utils
 from telethon.errors.rpcerrorlist import (
     ChatWriteForbiddenError,
     FloodWaitError,
@@ -24,12 +24,25 @@ from telethon.tl import types
 from bot.db.func import RedisStorage
 from bot.db.models import Account, AccountTexts, Job, Username
 from bot.settings import se
-from bot.utils.func import build_text_pools, randomize_text_message, send_message_safe
+from bot.utils.func import (
+    TEXT_POOLS_VERSION,
+    TextPools,
+    build_text_pools,
+    randomize_text_message,
+    send_message_safe,
+)
+from bot.utils.ratelimit import Jitter
 
 logger = logging.getLogger(__name__)
 _msgpack_encoder = msgspec.msgpack.Encoder()
+# Собственный генератор для задержек рассылки.
+_rng = random.Random()
 _phone_privacy_configured = False
-_USERNAME_PATTERN = re.compile(r"^[A-Za-z0-9_]{5,32}$")
+_TEXT_POOLS_TTL = 600
+# Допустимые символы username Telegram: латиница, цифры и "_", длина 5–32.
+_USERNAME_CHARS = frozenset(string.ascii_letters + string.digits + "_")
+# Максимум пользователей в одном users.GetUsers.
+_GET_USERS_CHUNK = 100
 
 
 def _account_label(account: Account) -> str:
@@ -41,7 +54,7 @@ def _normalize_username(username: str | None) -> str:
 
 
 def _is_valid_username(username: str) -> bool:
-    return bool(username) and bool(_USERNAME_PATTERN.fullmatch(username))
+    return 5 <= len(username) <= 32 and _USERNAME_CHARS.issuperset(username)
 
 
 def _build_stop_payload(account: Account) -> bytes:
@@ -51,9 +64,17 @@ def _build_stop_payload(account: Account) -> bytes:
     return _msgpack_encoder.encode(message)
 
 
-async def _get_folder_pinned_user_ids(client: TelegramClient) -> list[int]:
+async def _get_folder_pinned_users(
+    client: TelegramClient,
+) -> list[types.TypeInputUser]:
     """
-    Возвращает user_id закреплённых диалогов из папки по названию из .env.
+    Возвращает InputUser закреплённых диалогов из папки по названию из .env.
+
+    pinned_peers уже содержат access_hash, так что пользователей можно
+    запросить одним users.GetUsers без обращений к кэшу сессии.
+
+    Не кэшируется: задания отвечаются за один проход, и следующий job обычно
+    приходит уже после того, как оператор перезакрепил чаты.
     """
     folder_name = se.pinned_dialog_folder_name
     if not folder_name:
@@ -61,7 +82,6 @@ async def _get_folder_pinned_user_ids(client: TelegramClient) -> list[int]:
         return []
 
     try:
-        await client.catch_up()
         result = await client(functions.messages.GetDialogFiltersRequest())
     except Exception as e:  # noqa: BLE001
         logger.warning("Не удалось получить список папок: %s", e)
@@ -80,16 +100,40 @@ async def _get_folder_pinned_user_ids(client: TelegramClient) -> list[int]:
             continue
 
         pinned_peers = getattr(dialog_filter, "pinned_peers", []) or []
-        return [
-            peer.user_id
-            for peer in pinned_peers
-            if getattr(peer, "user_id", None) is not None
-        ]
+        # user_id -> InputUser: без дублей, в порядке закрепления.
+        input_users: dict[int, types.TypeInputUser] = {}
+        for peer in pinned_peers:
+            user_id = getattr(peer, "user_id", None)
+            if user_id is None or user_id in input_users:
+                continue
+            try:
+                input_users[user_id] = utils.get_input_user(peer)
+            except TypeError:
+                continue
+        return list(input_users.values())
 
     logger.warning("Папка с названием '%s' не найдена", folder_name)
     return []
 
 
+async def _get_users(
+    client: TelegramClient, input_users: list[types.TypeInputUser]
+) -> list[types.User]:
+    """
+    Получает пользователей пачками users.GetUsers вместо get_entity на каждого.
+    """
+    users: list[types.User] = []
+    for start in range(0, len(input_users), _GET_USERS_CHUNK):
+        chunk = input_users[start : start + _GET_USERS_CHUNK]
+        try:
+            result = await client(functions.users.GetUsersRequest(id=chunk))
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Не удалось получить пользователей: %s", e)
+            continue
+        users.extend(user for user in result if isinstance(user, types.User))
+    return users
+
+
 async def _ensure_phone_hidden(client: TelegramClient) -> None:
     """
     Ставит приватность номера на "никто", чтобы он не раскрывался при добавлении.
@@ -110,40 +154,62 @@ async def _ensure_phone_hidden(client: TelegramClient) -> None:
         logger.warning("Не удалось выставить приватность номера: %s", e)
 
 
+async def _add_contact(
+    client: TelegramClient,
+    entity: types.User,
+    item_name: str,
+    semaphore: asyncio.Semaphore,
+) -> str | None:
+    """
+    Добавляет пользователя в контакты с именем item_name.
+
+    Возвращает строку "item_name - @username" или None, если не получилось.
+    """
+    async with semaphore:
+        try:
+            input_user = await client.get_input_entity(entity)
+            if isinstance(input_user, types.InputPeerUser):
+                input_user = types.InputUser(
+                    user_id=input_user.user_id, access_hash=input_user.access_hash
+                )
+            await client(
+                functions.contacts.AddContactRequest(
+                    id=input_user,
+                    first_name=item_name or entity.first_name or "",
+                    last_name="",
+                    phone="",
+                    add_phone_privacy_exception=False,
+                )
+            )
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Не удалось добавить контакт @%s: %s", entity.username, e)
+            return None
+
+    return f"{item_name or entity.first_name or ''} - @{entity.username}"
+
+
 async def update_account_name(
     client: TelegramClient,
     sessionmaker: async_sessionmaker[AsyncSession],
-    storage: RedisStorage,
+    account_id: int,
 ) -> None:
     """
     Раз в 3 часа обновляет name аккаунта в БД по данным из Telegram.
     """
-    account_id_raw = await storage.get("account_id")
-    try:
-        account_id = int(account_id_raw)
-    except (TypeError, ValueError):
-        logger.warning(
-            "Не удалось определить account_id для обновления имени (raw=%s)",
-            account_id_raw,
-        )
-        return
-
     me = await client.get_me()
     if not me:
         logger.warning("get_me вернул None — пропускаем обновление имени")
         return
 
-    name_parts = [me.first_name or "", me.last_name or ""]
-    new_name = " ".join(filter(None, name_parts)) or (me.username or "")
+    first_name = me.first_name or ""
+    last_name = me.last_name or ""
+    new_name = f"{first_name} {last_name}".strip() or (me.username or "")
     if not new_name:
         logger.warning("Имя для обновления пустое — пропускаем")
         return
 
     async with sessionmaker() as session:
-        result = await session.execute(
-            select(Account).where(Account.id == account_id).limit(1)
-        )
-        account = result.scalar_one_or_none()
+        account = await session.get(Account, account_id)
         if not account:
             logger.error("Аккаунт id=%s не найден в БД, не обновляем имя", account_id)
             return
@@ -157,10 +223,100 @@ async def update_account_name(
         logger.info("Обновили имя аккаунта id=%s на '%s'", account_id, new_name)
 
 
+async def _select_mailing_targets(
+    session: AsyncSession,
+    account_id: int,
+    after_id: int,
+    limit: int,
+) -> list[dict[str, Any]]:
+    """
+    Следующая пачка неотправленных username после after_id (keyset-пагинация).
+    """
+    result = await session.execute(
+        lambda_stmt(
+            lambda: select(Username.id, Username.username, Username.item_name)
+            .where(
+                Username.account_id == account_id,
+                Username.sended == false(),
+                Username.id > after_id,
+            )
+            .order_by(Username.id)
+            .limit(limit)
+        )
+    )
+    return [
+        {"id": row.id, "username": row.username, "item_name": row.item_name}
+        for row in result.all()
+    ]
+
+
+async def _load_mailing_state(
+    session: AsyncSession,
+    storage: RedisStorage,
+    account_texts_id: int,
+    cursor_key: str,
+) -> tuple[TextPools, int]:
+    """
+    Возвращает пулы текстов и курсор рассылки.
+
+    Пулы читаем из Redis вместе с курсором одним MGET и собираем из БД,
+    только если их там нет.
+    """
+    # Тексты меняются редко — собранные пулы живут в Redis _TEXT_POOLS_TTL.
+    pools_key = f"text_pools:v{TEXT_POOLS_VERSION}:{account_texts_id}"
+    text_pools, last_id = await storage.mget(
+        pools_key, cursor_key, types=(TextPools, int)
+    )
+    if text_pools is None:
+        text_pools = await build_text_pools(session, account_texts_id)
+        await storage.set(pools_key, text_pools, ex=_TEXT_POOLS_TTL)
+    return text_pools, last_id or 0
+
+
+async def _stop_account(session: AsyncSession, account: Account) -> None:
+    """
+    Останавливает рассылку аккаунта и ставит уведомление для менеджер-бота.
+    """
+    account.is_started = False
+    await session.execute(
+        insert(Job).values(
+            account_id=account.id,
+            name="account_notification",
+            answer=_build_stop_payload(account),
+        )
+    )
+    await session.commit()
+    logger.info("Пользователи закончились — ставим бота на стоп")
+
+
+async def _flush_mailing_progress(
+    session: AsyncSession,
+    pending_sent: list[int],
+    pending_delete: list[int],
+) -> None:
+    """
+    Одним коммитом помечает отправленных и удаляет некорректные username.
+
+    Списки очищаются после записи.
+    """
+    if not pending_sent and not pending_delete:
+        return
+    if pending_sent:
+        await session.execute(
+            update(Username).where(Username.id.in_(pending_sent)).values(sended=True)
+        )
+    if pending_delete:
+        await session.execute(delete(Username).where(Username.id.in_(pending_delete)))
+    await session.commit()
+    pending_sent.clear()
+    pending_delete.clear()
+
+
 async def mailing(
     client: TelegramClient,
     sessionmaker: async_sessionmaker[AsyncSession],
     storage: RedisStorage,
+    account_id: int,
     *,
     batch_size: int = 5,
     base_delay: tuple[float, float] = (6.0, 12.0),
@@ -170,222 +326,221 @@ async def mailing(
     """
     Рассылка сообщений пользователям, которым ещё не отправляли.
 
-    Бот берёт свой account_id из Redis, чтобы отправлять только свои username.
+    account_id передаётся при старте, чтобы отправлять только свои username.
     """
     max_send_attempts = 3
-    account_id_raw = await storage.get("account_id")
-    try:
-        account_id = int(account_id_raw)
-    except (TypeError, ValueError):
-        logger.warning(
-            "Не удалось определить account_id для рассылки (raw=%s)", account_id_raw
-        )
-        return
-
     async with sessionmaker() as session:
-        account = await session.get(Account, account_id)
-        if not account:
+        row = (
+            await session.execute(
+                select(Account, AccountTexts.id)
+                .outerjoin(AccountTexts, AccountTexts.account_id == Account.id)
+                .where(Account.id == account_id)
+                .limit(1)
+            )
+        ).first()
+        if not row:
             return
+        account, account_texts_id = row
         if not account.is_started or not account.is_connected:
             return
-        account_texts_id = await session.scalar(
-            select(AccountTexts.id).where(AccountTexts.account_id == account_id).limit(1)
-        )
+        # Настройки аккаунта читаем один раз, дальше работаем с локальными.
+        account_batch_size = account.batch_size
         if not account_texts_id:
             logger.warning(
                 "Тексты для account_id=%s не настроены — рассылка остановлена",
                 account_id,
             )
             return
-        text_pools = await build_text_pools(session, account_texts_id)
-        result = await session.execute(
-            select(Username.id, Username.username, Username.item_name)
-            .where(
-                Username.sended.is_(False),
-                Username.account_id == account_id,
-            )
-            .order_by(Username.id)
-            .limit(account.batch_size)
+        cursor_key = f"mailing_cursor:{account_id}"
+        text_pools, last_id = await _load_mailing_state(
+            session, storage, account_texts_id, cursor_key
         )
-        targets = [
-            {"id": row.id, "username": row.username, "item_name": row.item_name}
-            for row in result.all()
-        ]
+        targets = await _select_mailing_targets(
+            session, account_id, last_id, account_batch_size
+        )
+        if not targets and last_id:
+            # Дошли до конца списка — начинаем заново, чтобы подобрать тех,
+            # кого пропустили (например, из-за FloodWait).
+            last_id = 0
+            targets = await _select_mailing_targets(
+                session, account_id, last_id, account_batch_size
+            )
 
         if not targets:
             logger.info("Нет пользователей для рассылки")
-            account.is_started = False
-            session.add(
-                Job(
-                    account_id=account.id,
-                    name="account_notification",
-                    answer=_build_stop_payload(account),
-                )
-            )
-            await session.commit()
-            logger.info("Пользователи закончились — ставим бота на стоп")
+            await _stop_account(session, account)
             return
 
         logger.info("Начинаем рассылку: %s получателей", len(targets))
 
-        sent = 0
-        for idx, username_row in enumerate(targets, start=1):
-            username_id = username_row["id"]
-            username_value_raw = username_row["username"]
-            item_name_value = username_row["item_name"]
-            username_value = _normalize_username(username_value_raw)
-            if not _is_valid_username(username_value):
-                await session.execute(delete(Username).where(Username.id == username_id))
-                await session.commit()
-                logger.info(
-                    "Удаляем некорректный username перед отправкой: @%s",
-                    username_value or username_value_raw,
-                )
-                continue
+        limiter = Jitter(
+            {
+                "send": base_delay,
+                "retry": (2.0, 5.0),
+                "cooldown": cooldown_range,
+            },
+            rng=_rng,
+        )
 
-            messages_raw = await randomize_text_message(item_name_value, text_pools)
-            messages = (
+        # Изменения копим и сбрасываем пачкой на антифрод-паузе и в конце,
+        # а не коммитом после каждого сообщения.
+        pending_sent: list[int] = []
+        pending_delete: list[int] = []
+        sent = 0
+        processed_id = last_id
+        # Остались ли в пачке получатели, которых надо повторить позже.
+        left_unsent = False
+
+        # Тексты для всей пачки готовим заранее, вне окна отправки.
+        batch_messages: list[list[str]] = []
+        for username_row in targets:
+            messages_raw = randomize_text_message(
+                username_row["item_name"], text_pools
+            )
+            batch_messages.append(
                 messages_raw if isinstance(messages_raw, list) else [messages_raw]
             )
 
-            delay = random.uniform(*base_delay)
-            await asyncio.sleep(delay)
-
-            attempt = 0
-            success = False
-            skip_deletion = False
-            stop_mailing = False
-
-            while attempt < max_send_attempts and not success:
-                attempt += 1
-                try:
-                    success = await send_message_safe(
-                        client,
-                        username_value,
-                        messages,
-                        delay=random.uniform(0.8, 1.6),
-                    )
-                except FloodWaitError as e:
-                    wait_time = e.seconds + random.randint(3, 12)
-                    logger.warning(
-                        "FloodWait на @%s: спим %s сек", username_value, wait_time
-                    )
-                    await asyncio.sleep(wait_time)
-                    skip_deletion = True
-                    break
-                except PeerFloodError:
-                    logger.error(
-                        "Telegram ограничил отправку (PeerFlood). Останавливаемся."
-                    )
-                    stop_mailing = True
-                    break
-                except (PeerIdInvalidError, UsernameInvalidError):
+        try:
+            for idx, (username_row, messages) in enumerate(
+                zip(targets, batch_messages), start=1
+            ):
+                username_id = username_row["id"]
+                username_value_raw = username_row["username"]
+                username_value = _normalize_username(username_value_raw)
+                if not _is_valid_username(username_value):
+                    pending_delete.append(username_id)
                     logger.info(
-                        "Некорректный username/peer для @%s — удаляем запись",
-                        username_value,
-                    )
-                    break
-                except (
-                    UserPrivacyRestrictedError,
-                    UserIsBlockedError,
-                    UserDeactivatedError,
-                    UserDeactivatedBanError,
-                    ChatWriteForbiddenError,
-                ) as e:
-                    logger.info("Не можем написать @%s: %s", username_value, e)
-                    await session.execute(
-                        update(Username)
-                        .where(Username.id == username_id)
-                        .values(sended=True)
+                        "Удаляем некорректный username перед отправкой: @%s",
+                        username_value or username_value_raw,
                     )
-                    await session.commit()
-                    skip_deletion = True
+                    continue
+
+                await limiter.wait("send")
+
+                attempt = 0
+                success = False
+                skip_deletion = False
+                stop_mailing = False
+
+                while attempt < max_send_attempts and not success:
+                    attempt += 1
+                    try:
+                        success = await send_message_safe(
+                            client,
+                            username_value,
+                            messages,
+                            delay=_rng.uniform(0.8, 1.6),
+                        )
+                    except FloodWaitError as e:
+                        wait_time = e.seconds + _rng.randint(3, 12)
+                        logger.warning(
+                            "FloodWait на @%s: спим %s сек", username_value, wait_time
+                        )
+                        await asyncio.sleep(wait_time)
+                        skip_deletion = True
+                        left_unsent = True
+                        break
+                    except PeerFloodError:
+                        logger.error(
+                            "Telegram ограничил отправку (PeerFlood). Останавливаемся."
+                        )
+                        stop_mailing = True
+                        break
+                    except (PeerIdInvalidError, UsernameInvalidError):
+                        logger.info(
+                            "Некорректный username/peer для @%s — удаляем запись",
+                            username_value,
+                        )
+                        break
+                    except (
+                        UserPrivacyRestrictedError,
+                        UserIsBlockedError,
+                        UserDeactivatedError,
+                        UserDeactivatedBanError,
+                        ChatWriteForbiddenError,
+                    ) as e:
+                        logger.info("Не можем написать @%s: %s", username_value, e)
+                        pending_sent.append(username_id)
+                        skip_deletion = True
+                        break
+                    except Exception as e:  # noqa: BLE001
+                        logger.error(
+                            "Ошибка при отправке @%s (попытка %s/%s): %s",
+                            username_value,
+                            attempt,
+                            max_send_attempts,
+                            e,
+                        )
+                        logger.debug("Трейсбек ошибки отправки", exc_info=True)
+                    finally:
+                        # Паузы лимитера отсчитываются от последней попытки
+                        # отправки (после FloodWait — от конца ожидания).
+                        limiter.touch()
+
+                    if success:
+                        break
+
+                    if (
+                        attempt < max_send_attempts
+                        and not skip_deletion
+                        and not stop_mailing
+                    ):
+                        retry_delay = await limiter.wait("retry")
+                        logger.warning(
+                            "Повторяем отправку @%s (попытка %s/%s) после паузы %.1f сек",
+                            username_value,
+                            attempt + 1,
+                            max_send_attempts,
+                            retry_delay,
+                        )
+
+                if stop_mailing:
+                    left_unsent = True
                     break
-                except Exception as e:  # noqa: BLE001
-                    logger.exception(
-                        "Ошибка при отправке @%s (попытка %s/%s): %s",
-                        username_value,
-                        attempt,
-                        max_send_attempts,
-                        e,
-                    )
-                    await session.rollback()
 
+                processed_id = username_id
                 if success:
-                    break
-
-                if (
-                    attempt < max_send_attempts
-                    and not skip_deletion
-                    and not stop_mailing
-                ):
-                    retry_delay = random.uniform(2.0, 5.0)
-                    logger.warning(
-                        "Повторяем отправку @%s (попытка %s/%s) через %.1f сек",
+                    pending_sent.append(username_id)
+                    sent += 1
+                elif not skip_deletion:
+                    pending_delete.append(username_id)
+                    logger.info(
+                        "Удалили запись для @%s после %s неудачных попыток отправки",
                         username_value,
-                        attempt + 1,
                         max_send_attempts,
-                        retry_delay,
                     )
-                    await asyncio.sleep(retry_delay)
-
-            if stop_mailing:
-                break
-
-            if success:
-                await session.execute(
-                    update(Username)
-                    .where(Username.id == username_id)
-                    .values(sended=True)
-                )
-                await session.commit()
-                sent += 1
-            elif not skip_deletion:
-                await session.execute(delete(Username).where(Username.id == username_id))
-                await session.commit()
-                logger.info(
-                    "Удалили запись для @%s после %s неудачных попыток отправки",
-                    username_value,
-                    max_send_attempts,
-                )
 
-            if skip_deletion and not success:
-                continue
+                if skip_deletion and not success:
+                    continue
 
-            if idx % cooldown_every == 0:
-                cooldown = random.uniform(*cooldown_range)
-                logger.info(
-                    "Антифрод-пауза после %s сообщений: %.1f сек", idx, cooldown
-                )
-                await asyncio.sleep(cooldown)
+                if idx % cooldown_every == 0:
+                    await _flush_mailing_progress(
+                        session, pending_sent, pending_delete
+                    )
+                    # Задержка перед следующей отправкой идёт после паузы.
+                    cooldown = await limiter.wait("cooldown", touch=True)
+                    logger.info(
+                        "Антифрод-пауза после %s сообщений: %.1f сек", idx, cooldown
+                    )
+        finally:
+            # Даже при остановке или исключении не теряем отметки об отправке.
+            await _flush_mailing_progress(session, pending_sent, pending_delete)
+            await storage.set(cursor_key, processed_id)
 
         logger.info("Рассылка завершена. Отправлено сообщений: %s", sent)
 
-        remaining = await session.scalar(
-            select(Username.id)
-            .where(
-                Username.sended.is_(False),
-                Username.account_id == account_id,
-            )
-            .limit(1)
-        )
-        if remaining is None:
-            account.is_started = False
-            session.add(
-                Job(
-                    account_id=account.id,
-                    name="account_notification",
-                    answer=_build_stop_payload(account),
-                )
-            )
-            await session.commit()
-            logger.info("Пользователи закончились — ставим бота на стоп")
+        # Выборка шла с начала списка и вернула неполную пачку — значит,
+        # неотправленных больше нет. Иначе курсор дойдёт до конца, начнёт
+        # заново, и остановка случится на пустой выборке.
+        if not last_id and len(targets) < account_batch_size and not left_unsent:
+            await _stop_account(session, account)
 
 
 async def process_jobs(
     client: TelegramClient,
     sessionmaker: async_sessionmaker[AsyncSession],
-    storage: RedisStorage,
+    account_id: int,
 ) -> None:
     """
     Обрабатывает задания с name='get_names_and_usernames'.
@@ -394,91 +549,73 @@ async def process_jobs(
     Username, добавляет контакты с именем item_name и сохраняет список
     в job.answer (msgpack).
     """
-    account_id_raw = await storage.get("account_id")
-    try:
-        account_id = int(account_id_raw)
-    except (TypeError, ValueError):
-        logger.warning(
-            "Не удалось определить account_id для обработки jobs (raw=%s)",
-            account_id_raw,
-        )
-        return
-
     async with sessionmaker() as session:
         jobs_result = await session.execute(
-            select(Job).where(
-                Job.account_id == account_id,
-                Job.name == "get_names_and_usernames",
-                Job.answer.is_(None),
+            lambda_stmt(
+                lambda: select(Job.id).where(
+                    Job.account_id == account_id,
+                    Job.name == "get_names_and_usernames",
+                    Job.answer.is_(None),
+                )
             )
         )
-        jobs = list(jobs_result.scalars().all())
-        if not jobs:
+        job_ids = list(jobs_result.scalars().all())
+        if not job_ids:
             return
 
-        usernames_result = await session.execute(
-            select(Username).where(Username.account_id == account_id)
-        )
-        usernames_map = {
-            (row.username or "").lstrip("@").lower(): row
-            for row in usernames_result.scalars().all()
-        }
-
         await _ensure_phone_hidden(client)
 
-        pinned_user_ids = await _get_folder_pinned_user_ids(client)
-        if not pinned_user_ids:
+        pinned_users = await _get_folder_pinned_users(client)
+        if not pinned_users:
             logger.warning(
                 "В указанной папке нет закрепленных чатов или она не найдена"
             )
             return
 
-        processed_pairs: list[str] = []
-        for user_id in set(pinned_user_ids):
-            try:
-                entity = await client.get_entity(types.PeerUser(user_id=user_id))
-            except Exception as e:  # noqa: BLE001
-                logger.warning(
-                    "Не удалось получить сущность пользователя %s: %s", user_id, e
+        entities = await _get_users(client, pinned_users)
+        wanted = [entity.username.lower() for entity in entities if entity.username]
+        # username (без "@", в нижнем регистре) -> item_name
+        usernames_map: dict[str, str] = {}
+        if wanted:
+            # В БД username может храниться с "@" — ищем оба варианта.
+            # Сравниваем lower() с обеих сторон, чтобы не зависеть от
+            # колляции колонки; индекс — (account_id, lower(username)).
+            usernames_result = await session.execute(
+                select(Username.username, Username.item_name).where(
+                    Username.account_id == account_id,
+                    func.lower(Username.username).in_(
+                        wanted + [f"@{username}" for username in wanted]
+                    ),
                 )
-                continue
-
-            if not isinstance(entity, types.User):
-                continue
+            )
+            usernames_map = {
+                (row.username or "").lstrip("@").lower(): row.item_name
+                for row in usernames_result.all()
+            }
 
+        matched: list[tuple[types.User, str]] = []
+        for entity in entities:
             username = (entity.username or "").lstrip("@").lower()
             if not username:
                 continue
 
-            username_row = usernames_map.get(username)
-            if not username_row:
+            item_name = usernames_map.get(username)
+            if item_name is None:
                 continue
 
-            try:
-                input_user = await client.get_input_entity(entity)
-                if isinstance(input_user, types.InputPeerUser):
-                    input_user = types.InputUser(
-                        user_id=input_user.user_id, access_hash=input_user.access_hash
-                    )
-                await client(
-                    functions.contacts.AddContactRequest(
-                        id=input_user,
-                        first_name=username_row.item_name or entity.first_name or "",
-                        last_name="",
-                        phone="",
-                        add_phone_privacy_exception=False,
-                    )
-                )
-            except Exception as e:  # noqa: BLE001
-                logger.warning("Не удалось добавить контакт @%s: %s", username, e)
-                continue
+            matched.append((entity, item_name))
 
-            processed_pairs.append(
-                f"{username_row.item_name or entity.first_name or ''} - @{entity.username}"
+        semaphore = asyncio.Semaphore(max(1, se.add_contact_concurrency))
+        results = await asyncio.gather(
+            *(
+                _add_contact(client, entity, item_name, semaphore)
+                for entity, item_name in matched
             )
+        )
+        processed_pairs = [pair for pair in results if pair is not None]
 
         packed_answer = _msgpack_encoder.encode(processed_pairs)
-        for job in jobs:
-            job.answer = packed_answer
-
+        await session.execute(
+            update(Job).where(Job.id.in_(job_ids)).values(answer=packed_answer)
+        )
         await session.commit()
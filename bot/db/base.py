@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from bot.settings import Settings
 
 
@@ -35,17 +36,24 @@ class Base(DeclarativeBase, AsyncAttrs):
 async def create_db_session_pool(
     se: Settings,
 ) -> tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
+    # Один процесс на аккаунт и максимум три фоновые задачи, каждая со своей
+    # сессией, — больше трёх соединений к MySQL не нужно.
     engine: AsyncEngine = create_async_engine(
         url=se.mysql_dsn(),
-        max_overflow=10,
-        pool_size=100,
-        # pool_pre_ping with aiomysql can trigger MissingGreenlet on ping;
-        # recycle connections more often instead of pre-pinging.
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=3,
+        max_overflow=0,
+        # No pre-ping on checkout: connections are recycled every
+        # pool_recycle seconds instead, well under MySQL's wait_timeout.
         pool_pre_ping=False,
         pool_recycle=300,
     )
 
-    return engine, async_sessionmaker(engine, expire_on_commit=False)
+    # expire_on_commit=False: задачи продолжают работать с account после
+    # commit, без этого каждый доступ к атрибуту перечитывал бы строку.
+    return engine, async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
 
 
 async def close_db(engine: AsyncEngine) -> None:
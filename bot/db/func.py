@@ -3,13 +3,25 @@ from typing import Any
 import msgspec
 from redis.asyncio import Redis
 
+_ENCODER = msgspec.msgpack.Encoder()
+_ANY_DECODER = msgspec.msgpack.Decoder()
+# Типизированные декодеры переиспользуются: msgspec компилирует схему один раз.
+_TYPED_DECODERS: dict[Any, msgspec.msgpack.Decoder] = {}
+
+
+def _decoder_for(type_: Any) -> msgspec.msgpack.Decoder:
+    if type_ is None:
+        return _ANY_DECODER
+    decoder = _TYPED_DECODERS.get(type_)
+    if decoder is None:
+        decoder = _TYPED_DECODERS[type_] = msgspec.msgpack.Decoder(type_)
+    return decoder
+
 
 class RedisStorage:
     def __init__(self, redis: Redis, client_hash: str):
         self._redis = redis
         self._client_hash = client_hash
-        self.encoder = msgspec.json.Encoder()
-        self.decoder = msgspec.json.Decoder()
 
     def build_key(self, key: str) -> str:
         return f"wb_userbot:{self._client_hash}:{key}"
@@ -19,12 +31,55 @@ class RedisStorage:
         Извлекает данные из Redis и десериализует их с использованием msgspec.
 
         :param key: Ключ для извлечения данных.
-        :return: Десериализованные данные, или None если ключ не найден.
+        :return: Десериализованные данные, или None если ключ не найден или
+            значение не читается.
         """
         if not self._redis:
             return None
         data = await self._redis.get(self.build_key(key))
-        return self.decoder.decode(data) if data else None
+        if not data:
+            return None
+        try:
+            return _ANY_DECODER.decode(data)
+        except msgspec.DecodeError:
+            return None
+
+    async def get_int(self, key: Any) -> int | None:
+        """
+        Извлекает целое число из Redis типизированным декодером msgspec.
+
+        :param key: Ключ для извлечения данных.
+        :return: Число, или None если ключ не найден или значение не число.
+        """
+        if not self._redis:
+            return None
+        data = await self._redis.get(self.build_key(key))
+        if not data:
+            return None
+        try:
+            return _decoder_for(int).decode(data)
+        except msgspec.DecodeError:
+            return None
+
+    async def mget(self, *keys: Any, types: tuple[Any, ...] = ()) -> list[Any | None]:
+        """
+        Извлекает несколько ключей одним запросом MGET.
+
+        :param keys: Ключи для извлечения данных.
+        :param types: Ожидаемые типы значений по порядку ключей (можно не все).
+        :return: Значения в порядке ключей; None для отсутствующих и битых.
+        """
+        if not self._redis or not keys:
+            return [None] * len(keys)
+        raws = await self._redis.mget([self.build_key(key) for key in keys])
+        values: list[Any | None] = []
+        for idx, data in enumerate(raws):
+            type_ = types[idx] if idx < len(types) else None
+            try:
+                values.append(_decoder_for(type_).decode(data) if data else None)
+            except msgspec.DecodeError:
+                values.append(None)
+        return values
 
     async def set(self, key: Any, value: Any, **kwargs) -> None:
         """
@@ -33,7 +88,7 @@ class RedisStorage:
         :param key: Ключ для сохранения данных.
         :param value: Данные для сохранения.
         """
-        serialized_data = self.encoder.encode(value)
+        serialized_data = _ENCODER.encode(value)
         await self._redis.set(self.build_key(key), serialized_data, **kwargs)
 
     async def delete(self, *keys: Any) -> None:
@@ -1,8 +1,11 @@
 from sqlalchemy import (
     BLOB,
     BigInteger,
+    Index,
     String,
     Text,
+    func,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.orm.properties import ForeignKey
@@ -197,6 +200,18 @@ class ClosingText(AccountTextItemBase):
 
 class Username(Base):
     __tablename__ = "usernames"
+    # DDL индексов — migrations/001_add_indexes.sql.
+    __table_args__ = (
+        # Покрывает выборку рассылки: account_id + sended, по возрастанию id.
+        Index("ix_usernames_account_sended_id", "account_id", "sended", "id"),
+        # Поиск закреплённых пользователей по lower(username) в process_jobs
+        # (функциональная часть ключа, MySQL 8.0.13+).
+        Index(
+            "ix_usernames_account_username",
+            "account_id",
+            func.lower(text("username")),
+        ),
+    )
 
     account: Mapped["Account"] = relationship(back_populates="usernames")
     account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id"))
@@ -208,6 +223,11 @@ class Username(Base):
 
 class Job(Base):
     __tablename__ = "jobs"
+    # DDL индекса — migrations/001_add_indexes.sql.
+    __table_args__ = (
+        # Выборка необработанных заданий аккаунта по имени в process_jobs.
+        Index("ix_jobs_account_name", "account_id", "name"),
+    )
 
     account: Mapped["Account"] = relationship(back_populates="jobs")
     account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id"))
@@ -35,10 +35,12 @@ class Settings:
         os.environ.get("MAILING_INTERVAL_MAX_SEC", 400)
     )
     pinned_dialog_folder_name: str | None = os.environ.get("PINNED_DIALOG_FOLDER_NAME")
+    # Сколько AddContactRequest держим в полёте одновременно (антифлуд).
+    add_contact_concurrency: int = int(os.environ.get("ADD_CONTACT_CONCURRENCY", 3))
 
     def mysql_dsn(self) -> URL:
         return URL.create(
-            drivername="mysql+aiomysql",
+            drivername="mysql+asyncmy",
             database=self.db.db,
             username=self.db.username,
             password=self.db.password,
@@ -47,7 +49,7 @@ class Settings:
 
     def mysql_dsn_string(self) -> str:
         return URL.create(
-            drivername="mysql+aiomysql",
+            drivername="mysql+asyncmy",
             database=self.db.db,
             username=self.db.username,
             password=self.db.password,
@@ -1,17 +1,18 @@
 import asyncio
 import logging
 import random
+import re
 from dataclasses import dataclass
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from telethon import TelegramClient
 from telethon.hints import EntityLike
-from sqlalchemy import select
+from sqlalchemy import bindparam, literal, select, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.db.models import (
-    AccountTexts,
+    AccountTextItemBase,
     ClarifyingText,
     ClosingText,
     FollowUpText,
@@ -24,15 +25,46 @@ from bot.db.models import (
 )
 
 logger = logging.getLogger(__name__)
+# Собственный генератор для выбора текстов из пулов.
+_rng = random.Random()
+_MSK = ZoneInfo("Europe/Moscow")
+# Начала вопросов, после которых вводная фраза была бы тавтологией.
+_ASK_PREFIXES = (
+    "расскажите",
+    "подскажите",
+    "скажите",
+    "интересуюсь",
+    "интересует",
+    "можно",
+    "уточните",
+    "хочу уточнить",
+    "я хочу",
+    "я хотела",
+)
+_ASK_RE = re.compile(
+    r"\s*(?:" + "|".join(map(re.escape, _ASK_PREFIXES)) + ")", re.IGNORECASE
+)
+# Непустые строки вставленного списка, без промежуточного списка строк.
+# Разделители — те же, что у str.splitlines().
+_LINE_RE = re.compile(r"[^\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]+")
+_GRATITUDE_KEYWORDS = ("благодар", "признател", "рада", "спасибо")
+# Час по Москве -> поле TextPools с приветствиями для этого времени суток.
+_HOUR_TO_GREETINGS: tuple[str, ...] = (
+    ("greetings_night",) * 5
+    + ("greetings_morning",) * 7
+    + ("greetings_day",) * 6
+    + ("greetings_evening",) * 5
+    + ("greetings_night",)
+)
 
 
-@dataclass
+@dataclass(slots=True)
 class UserData:
     username: str
     item_name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class TextPools:
     greetings_morning: list[str]
     greetings_day: list[str]
@@ -43,6 +75,20 @@ class TextPools:
     follow_up_texts: list[str]
     lead_in_texts: list[str]
     closing_texts: list[str]
+    # Признаки, посчитанные по текстам при сборке пулов (индексы совпадают).
+    clarifying_starts_with_ask: list[bool]
+    follow_up_has_gratitude: list[bool]
+    closing_has_gratitude: list[bool]
+
+
+def _upper_first(text: str) -> str:
+    # В отличие от str.capitalize, не переводит остаток строки в нижний регистр.
+    return text[0].upper() + text[1:]
+
+
+def _has_gratitude(text: str) -> bool:
+    lowered = text.lower()
+    return any(kw in lowered for kw in _GRATITUDE_KEYWORDS)
 
 
 def _normalize_texts(items: list[object]) -> list[str]:
@@ -57,42 +103,74 @@ def _normalize_texts(items: list[object]) -> list[str]:
     return texts
 
 
-async def _fetch_texts(
-    session: AsyncSession, model: type[AccountTexts], account_texts_id: int
-) -> list[str]:
-    result = await session.execute(
-        select(model.text).where(model.account_texts_id == account_texts_id)
+# Пулы, тексты которых всегда начинают фразу: храним их уже с заглавной буквы.
+_CAPITALIZED_POOLS = frozenset(
+    (
+        "greetings_morning",
+        "greetings_day",
+        "greetings_evening",
+        "greetings_night",
+        "greetings_anytime",
+        "follow_up_texts",
+        "closing_texts",
     )
-    texts: list[str] = []
-    for (text,) in result.all():
-        if isinstance(text, str):
-            stripped = text.strip()
-            if stripped:
-                texts.append(stripped)
-    return texts
+)
+# Версия содержимого TextPools для ключа кэша в Redis. Повышайте при любом
+# изменении того, что возвращает build_text_pools (поля, нормализация текстов),
+# иначе процессы будут брать из Redis пулы, собранные по-старому.
+TEXT_POOLS_VERSION = 3
+# Поле TextPools -> модель, из которой берутся его тексты.
+_POOL_MODELS: tuple[tuple[str, type[AccountTextItemBase]], ...] = (
+    ("greetings_morning", GreetingMorning),
+    ("greetings_day", GreetingDay),
+    ("greetings_evening", GreetingEvening),
+    ("greetings_night", GreetingNight),
+    ("greetings_anytime", GreetingAnytime),
+    ("clarifying_texts", ClarifyingText),
+    ("follow_up_texts", FollowUpText),
+    ("lead_in_texts", LeadInText),
+    ("closing_texts", ClosingText),
+)
+# Запрос строится один раз; меняется только параметр account_texts_id.
+_TEXT_POOLS_STMT = union_all(
+    *(
+        select(literal(name).label("pool"), model.text).where(
+            model.account_texts_id == bindparam("account_texts_id")
+        )
+        for name, model in _POOL_MODELS
+    )
+)
 
 
 async def build_text_pools(
     session: AsyncSession, account_texts_id: int
 ) -> TextPools:
+    """
+    Собирает все пулы текстов одним запросом UNION ALL по девяти таблицам.
+    """
+    result = await session.execute(
+        _TEXT_POOLS_STMT, {"account_texts_id": account_texts_id}
+    )
+    pools: dict[str, list[str]] = {name: [] for name, _ in _POOL_MODELS}
+    for pool, text in result.all():
+        if isinstance(text, str):
+            stripped = text.strip()
+            if stripped:
+                if pool in _CAPITALIZED_POOLS:
+                    stripped = stripped.capitalize()
+                pools[pool].append(stripped)
     return TextPools(
-        greetings_morning=await _fetch_texts(
-            session, GreetingMorning, account_texts_id
-        ),
-        greetings_day=await _fetch_texts(session, GreetingDay, account_texts_id),
-        greetings_evening=await _fetch_texts(
-            session, GreetingEvening, account_texts_id
-        ),
-        greetings_night=await _fetch_texts(session, GreetingNight, account_texts_id),
-        greetings_anytime=await _fetch_texts(
-            session, GreetingAnytime, account_texts_id
-        ),
-        clarifying_texts=await _fetch_texts(
-            session, ClarifyingText, account_texts_id
-        ),
-        follow_up_texts=await _fetch_texts(session, FollowUpText, account_texts_id),
-        lead_in_texts=await _fetch_texts(session, LeadInText, account_texts_id),
-        closing_texts=await _fetch_texts(session, ClosingText, account_texts_id),
+        **pools,
+        clarifying_starts_with_ask=[
+            _ASK_RE.match(text) is not None
+            for text in pools["clarifying_texts"]
+        ],
+        follow_up_has_gratitude=[
+            _has_gratitude(text) for text in pools["follow_up_texts"]
+        ],
+        closing_has_gratitude=[
+            _has_gratitude(text) for text in pools["closing_texts"]
+        ],
     )
 
 
@@ -100,20 +178,11 @@ def _pick_greeting(text_pools: TextPools) -> str:
     """
     Выбираем приветствие по московскому времени, добавляя случайность.
     """
-    now = datetime.now(ZoneInfo("Europe/Moscow"))
-    hour = now.hour
-
-    if 5 <= hour < 12:
-        base_pool = text_pools.greetings_morning
-    elif 12 <= hour < 18:
-        base_pool = text_pools.greetings_day
-    elif 18 <= hour < 23:
-        base_pool = text_pools.greetings_evening
-    else:
-        base_pool = text_pools.greetings_night
+    hour = datetime.now(_MSK).hour
+    base_pool: list[str] = getattr(text_pools, _HOUR_TO_GREETINGS[hour])
 
     # Иногда используем нейтральное приветствие, чтобы разнообразить тон.
-    if random.random() < 0.25 and text_pools.greetings_anytime:
+    if _rng.random() < 0.25 and text_pools.greetings_anytime:
         pool = base_pool + text_pools.greetings_anytime
     else:
         pool = base_pool or text_pools.greetings_anytime
@@ -129,7 +198,7 @@ def _pick_greeting(text_pools: TextPools) -> str:
     if not pool:
         raise ValueError("В AccountTexts нет доступных приветствий.")
 
-    return random.choice(pool).capitalize()
+    return _rng.choice(pool)
 
 
 async def send_message_safe(
@@ -139,6 +208,13 @@ async def send_message_safe(
     *,
     delay: float = 1.0,
 ):
+    """
+    Отправляет сообщения по порядку с паузой delay между ними.
+
+    client — общий подключённый клиент процесса: не создавайте клиента
+    на каждую отправку, иначе каждый раз заново поднимается соединение
+    и MTProto-сессия.
+    """
     _more_than_one_message = len(messages) > 1
     for message in messages:
         try:
@@ -151,11 +227,14 @@ async def send_message_safe(
     return True
 
 
-async def randomize_text_message(
+def randomize_text_message(
     item_name: str,
     text_pools: TextPools,
 ) -> str | list[str]:
     item = item_name.strip() or "товар"
+    # Методы генератора в локальных именах: их дёргают много раз за вызов.
+    rand = _rng.random
+    randrange = _rng.randrange
 
     def _with_punctuation(
         text: str, *, mark: str = ".", probability: float = 0.3
@@ -164,114 +243,108 @@ async def randomize_text_message(
             return ""
         if text.endswith((".", "!", "?")):
             return text
-        return f"{text}{mark}" if random.random() < probability else text
+        return f"{text}{mark}" if rand() < probability else text
 
     def _format_greeting(greeting_text: str) -> tuple[str, bool]:
         # Иногда без восклицательного знака, чтобы звучало естественнее.
-        punct = random.choices(["", "!", "."], weights=[0.35, 0.45, 0.2])[0]
+        # Веса 0.35 / 0.45 / 0.2 как накопленные границы одного броска.
+        r = rand()
+        punct = "" if r < 0.35 else ("!" if r < 0.8 else ".")
         text = f"{greeting_text}{punct}".strip()
         has_punct = punct in ("!", ".", "?")
         return text, has_punct
 
     greeting = _pick_greeting(text_pools)
-    lead_in = (
-        random.choice(text_pools.lead_in_texts) if text_pools.lead_in_texts else ""
-    )
+    lead_ins = text_pools.lead_in_texts
+    lead_in = lead_ins[randrange(len(lead_ins))] if lead_ins else ""
     if not text_pools.clarifying_texts:
         raise ValueError("В AccountTexts нет уточняющих текстов.")
-    question = random.choice(text_pools.clarifying_texts).format(item=item)
+    question_idx = randrange(len(text_pools.clarifying_texts))
+    question = text_pools.clarifying_texts[question_idx].format(item=item)
 
     # Если вопрос уже начинается с "расскажите/подскажите/скажите",
     # убираем вводную часть, чтобы избежать тавтологии.
-    question_start = question.lstrip().lower()
-    ask_prefixes = (
-        "расскажите",
-        "подскажите",
-        "скажите",
-        "интересуюсь",
-        "интересует",
-        "можно",
-        "уточните",
-        "хочу уточнить",
-        "я хочу",
-        "я хотела",
-    )
-    if question_start.startswith(ask_prefixes):
+    if text_pools.clarifying_starts_with_ask[question_idx]:
         lead_in = ""
-    follow_up = (
-        random.choice(text_pools.follow_up_texts) if text_pools.follow_up_texts else ""
-    )
-    follow_has_gratitude = any(
-        kw in follow_up.lower() for kw in ("благодар", "признател", "рада", "спасибо")
-    )
-
-    closing_choice = (
-        random.choice(text_pools.closing_texts) if text_pools.closing_texts else ""
-    )
+    follow_up = ""
+    follow_has_gratitude = False
+    if text_pools.follow_up_texts:
+        follow_idx = randrange(len(text_pools.follow_up_texts))
+        follow_up = text_pools.follow_up_texts[follow_idx]
+        follow_has_gratitude = text_pools.follow_up_has_gratitude[follow_idx]
+
+    closing_choice = ""
+    closing_has_gratitude = False
+    if text_pools.closing_texts:
+        closing_idx = randrange(len(text_pools.closing_texts))
+        closing_choice = text_pools.closing_texts[closing_idx]
+        closing_has_gratitude = text_pools.closing_has_gratitude[closing_idx]
     closing = (
-        _with_punctuation(closing_choice.capitalize(), probability=0.3)
+        _with_punctuation(closing_choice, probability=0.3)
         if closing_choice
         else ""
     )
 
     # Если follow_up уже содержит благодарность, убираем похожее закрытие,
     # чтобы не повторяться.
-    if follow_has_gratitude and closing_choice:
-        closing_has_gratitude = any(
-            kw in closing_choice.lower()
-            for kw in ("благодар", "признател", "спасибо", "рада")
-        )
-        if closing_has_gratitude:
-            closing = ""
+    if follow_has_gratitude and closing_has_gratitude:
+        closing = ""
 
     base_question = f"{lead_in}{question}"
-    base_question = base_question[0].upper() + base_question[1:]
+    base_question = _upper_first(base_question)
     base_question_inline = base_question
 
-    messages: list[str] = []
-
     # Случайно решаем, отправлять ли приветствие и разделять ли сообщения.
-    split_greeting = random.random() < 0.5
+    split_greeting = rand() < 0.5
     greeting_formatted, greeting_has_punct = _format_greeting(greeting)
     if not greeting_has_punct and base_question:
         base_question_inline = base_question[0].lower() + base_question[1:]
 
-    if split_greeting:
-        messages.append(greeting_formatted)
-        messages.append(base_question)
-    else:
-        messages.append(f"{greeting_formatted} {base_question_inline}".strip())
-
-    use_follow_up = bool(follow_up) and random.random() < 0.75
-    if use_follow_up:
-        follow_sentence = _with_punctuation(follow_up.capitalize(), probability=0.3)
+    # tail дописывается к последнему сообщению, follow_message идёт отдельным.
+    tail = ""
+    follow_message = ""
+    if follow_up and rand() < 0.75:
+        follow_sentence = _with_punctuation(follow_up, probability=0.3)
         if closing:
             follow_sentence = f"{follow_sentence} {closing}".strip()
 
-        split_follow = random.random() < 0.5
-        if split_follow:
-            messages.append(follow_sentence)
+        if rand() < 0.5:
+            follow_message = follow_sentence
         else:
-            messages[-1] = f"{messages[-1]} {follow_sentence}"
-    elif closing and random.random() < 0.4:
+            tail = follow_sentence
+    elif closing and rand() < 0.4:
         # Иногда добавляем только вежливое завершение без уточнений.
-        messages[-1] = f"{messages[-1]} {closing}"
+        tail = closing
 
-    return messages if len(messages) > 1 else messages[0]
+    if split_greeting:
+        last = base_question
+    else:
+        last = f"{greeting_formatted} {base_question_inline}".strip()
+    if tail:
+        last = f"{last} {tail}"
+
+    # Чаще всего выходит одно сообщение — его возвращаем без списка.
+    if not split_greeting and not follow_message:
+        return last
+
+    messages = [greeting_formatted, last] if split_greeting else [last]
+    if follow_message:
+        messages.append(follow_message)
+    return messages
 
 
 async def parse_users_from_text(text: str) -> tuple[list[UserData], list[str]]:
-    lines = text.splitlines()
     users = []
     line_not_handled = []
-    for line in lines:
-        if not line:
-            continue
-        r = line.split("-")
-        if not r or len(r) < 2:
-            line_not_handled.append(line)
+    users_append = users.append
+    not_handled_append = line_not_handled.append
+    for match in _LINE_RE.finditer(text):
+        line = match.group()
+        item_name, sep, tail = line.partition("-")
+        if not sep:
+            not_handled_append(line)
             continue
-        username = r[1].strip()
-        item_name = r[0].strip()
-        users.append(UserData(username, item_name))
+        # Username — только часть до следующего дефиса, хвост отбрасываем.
+        username = tail.partition("-")[0]
+        users_append(UserData(username.strip(), item_name.strip()))
     return users, line_not_handled
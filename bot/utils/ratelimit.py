@@ -0,0 +1,49 @@
+import asyncio
+import random
+import time
+from collections.abc import Mapping
+
+
+class Jitter:
+    """
+    Случайные паузы между действиями рассылки.
+
+    Пауза каждого вида берётся из своего диапазона и отсчитывается от
+    последнего действия (touch), а не прибавляется к уже прошедшему времени.
+    Обычные ожидания действием не считаются — touch вызывает код после
+    реальной отправки. Ожидание с touch=True (антифрод-пауза) само становится
+    точкой отсчёта: задержка перед следующей отправкой идёт после него.
+    """
+
+    def __init__(
+        self,
+        delays: Mapping[str, tuple[float, float]],
+        *,
+        rng: random.Random | None = None,
+    ) -> None:
+        self._delays = dict(delays)
+        self._rng = rng or random.Random()
+        self._last: float | None = None
+
+    def touch(self) -> None:
+        """Отмечает действие, от которого считается следующая пауза."""
+        self._last = time.monotonic()
+
+    async def wait(self, kind: str, *, touch: bool = False) -> float:
+        """
+        Ждёт паузу вида kind минус время, прошедшее с последнего touch.
+
+        :param kind: Вид паузы из словаря delays.
+        :param touch: Отметить конец ожидания как действие.
+        :return: Сколько секунд реально проспали.
+        """
+        low, high = self._delays[kind]
+        delay = self._rng.uniform(low, high)
+        if self._last is not None:
+            delay -= time.monotonic() - self._last
+        delay = max(delay, 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if touch:
+            self.touch()
+        return delay
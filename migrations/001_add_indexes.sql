@@ -0,0 +1,15 @@
+-- Индексы под горячие запросы фоновых задач (см. __table_args__ в
+-- bot/db/models.py). Таблицы создаются не из моделей, а create_all не
+-- добавляет индексы в уже существующие таблицы, поэтому применяем вручную
+-- один раз на каждую БД:
+--   mysql -h <host> -u <user> -p <db> < migrations/001_add_indexes.sql
+
+-- Выборка рассылки: account_id + sended, keyset по id.
+CREATE INDEX ix_usernames_account_sended_id ON usernames (account_id, sended, id);
+
+-- Поиск закреплённых пользователей по lower(username) в process_jobs.
+-- Функциональная часть ключа требует MySQL 8.0.13+.
+CREATE INDEX ix_usernames_account_username ON usernames (account_id, (lower(username)));
+
+-- Выборка необработанных заданий аккаунта по имени в process_jobs.
+CREATE INDEX ix_jobs_account_name ON jobs (account_id, name);
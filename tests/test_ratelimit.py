@@ -0,0 +1,73 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from bot.utils import ratelimit
+from bot.utils.ratelimit import Jitter
+
+
+class FakeClock:
+    """Подменяет time.monotonic и asyncio.sleep: сон только двигает время."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class JitterTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        patches = (
+            mock.patch.object(
+                ratelimit, "time", SimpleNamespace(monotonic=self.clock.monotonic)
+            ),
+            mock.patch.object(
+                ratelimit, "asyncio", SimpleNamespace(sleep=self.clock.sleep)
+            ),
+        )
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        # Нижняя и верхняя границы совпадают — задержки детерминированы.
+        self.limiter = Jitter(
+            {"send": (10.0, 10.0), "retry": (3.0, 3.0), "cooldown": (60.0, 60.0)}
+        )
+
+    async def test_first_wait_sleeps_full_delay(self) -> None:
+        self.assertEqual(await self.limiter.wait("send"), 10.0)
+        self.assertEqual(self.clock.sleeps, [10.0])
+
+    async def test_wait_subtracts_time_since_touch(self) -> None:
+        self.limiter.touch()
+        self.clock.now += 4.0
+        self.assertEqual(await self.limiter.wait("send"), 6.0)
+
+    async def test_wait_skips_sleep_when_delay_already_passed(self) -> None:
+        self.limiter.touch()
+        self.clock.now += 15.0
+        self.assertEqual(await self.limiter.wait("send"), 0.0)
+        self.assertEqual(self.clock.sleeps, [])
+
+    async def test_send_delay_follows_cooldown(self) -> None:
+        self.limiter.touch()  # отправка
+        self.assertEqual(await self.limiter.wait("cooldown", touch=True), 60.0)
+        # Задержка перед отправкой отсчитывается от конца антифрод-паузы.
+        self.assertEqual(await self.limiter.wait("send"), 10.0)
+        self.assertEqual(self.clock.sleeps, [60.0, 10.0])
+
+    async def test_retry_measured_from_failed_send(self) -> None:
+        self.assertEqual(await self.limiter.wait("send"), 10.0)
+        self.clock.now += 1.0  # неудачная попытка отправки
+        self.limiter.touch()
+        self.assertEqual(await self.limiter.wait("retry"), 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()